@@ -6,6 +6,7 @@ uses. AncestorTraversalVirtualMachine changes the execution order of basic
 blocks so that each only executes once.
 """
 
+import collections
 import logging
 
 
@@ -25,32 +26,33 @@ class AbstractVirtualMachine(pyvm2.VirtualMachine):
     returned method.
     """
 
+    # The key is the instruction suffix and the value is the magic method
+    # name. This is the same for every instance, so it is built once here.
+    binary_operator_name_mapping = dict(
+        ADD="__add__",
+        AND="__and__",
+        DIVIDE="__div__",
+        FLOOR_DIVIDE="__floordiv__",
+        LSHIFT="__lshift__",
+        MODULO="__mod__",
+        MULTIPLY="__mul__",
+        OR="__or__",
+        POWER="__pow__",
+        RSHIFT="__rshift__",
+        SUBSCR="__getitem__",
+        SUBTRACT="__sub__",
+        TRUE_DIVIDE="__truediv__",
+        XOR="__xor__",
+        )
+
     def __init__(self):
         super(AbstractVirtualMachine, self).__init__()
-        # The key is the instruction suffix and the value is the magic method
-        # name.
-        binary_operator_name_mapping = dict(
-            ADD="__add__",
-            AND="__and__",
-            DIVIDE="__div__",
-            FLOOR_DIVIDE="__floordiv__",
-            LSHIFT="__lshift__",
-            MODULO="__mod__",
-            MULTIPLY="__mul__",
-            OR="__or__",
-            POWER="__pow__",
-            RSHIFT="__rshift__",
-            SUBSCR="__getitem__",
-            SUBTRACT="__sub__",
-            TRUE_DIVIDE="__truediv__",
-            XOR="__xor__",
-            )
         # Use the above data to generate wrappers for each magic operators. This
         # replaces the original dict since any operator that is not listed here
         # will not work, so it is better to have it cause a KeyError.
         self.binary_operators = dict((op, self.magic_operator(magic))
                                      for op, magic in
-                                     binary_operator_name_mapping.iteritems())
+                                     self.binary_operator_name_mapping.items())
         # TODO(ampere): Add support for unary and comparison operators
 
     def magic_operator(self, name):
@@ -60,7 +62,7 @@ class AbstractVirtualMachine(pyvm2.VirtualMachine):
                                       [y], {})
         return magic_operator_wrapper
 
-    reversable_operators = set([
+    reversable_operators = frozenset([
         "__add__", "__sub__", "__mul__",
         "__div__", "__truediv__", "__floordiv__",
         "__mod__", "__divmod__", "__pow__",
@@ -168,7 +170,9 @@ class AncestorTraversalVirtualMachine(AbstractVirtualMachine):
           frame: The execution frame to update.
         """
         frame.block_table = self.cfg.get_block_table(frame.f_code)
-        frame.order = frame.block_table.get_ancestors_first_traversal()
+        # Blocks are consumed from the front as they finish, so use a deque.
+        frame.order = collections.deque(
+            frame.block_table.get_ancestors_first_traversal())
         assert frame.f_lasti == 0
 
     def frame_traversal_next(self, frame):
@@ -186,7 +190,7 @@ class AncestorTraversalVirtualMachine(AbstractVirtualMachine):
         """
         head = frame.order[0]
         if frame.f_lasti < head.begin or frame.f_lasti > head.end:
-            frame.order.pop(0)
+            frame.order.popleft()
             if not frame.order:
                 return False
             head = frame.order[0]
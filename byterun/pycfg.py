@@ -7,8 +7,8 @@ http://en.wikipedia.org/wiki/Control_flow_graph
 """
 
 import bisect
+import collections
 import dis
-import itertools
 import logging
 
 
@@ -70,6 +70,10 @@ _TARGETTED_CONDITIONAL_JUMPS = frozenset([
     dis.opmap["FOR_ITER"],
     ])
 
+# The relative and absolute jump opcodes from dis, which are lists there.
+_HASJREL = frozenset(dis.hasjrel)
+_HASJABS = frozenset(dis.hasjabs)
+
 _TARGETTED_JUMPS = (_TARGETTED_CONDITIONAL_JUMPS |
                     _TARGETTED_UNCONDITIONAL_JUMPS)
 
@@ -112,8 +116,17 @@ class InstructionsIndex(object):
     instruction_offsets: A list of instruction offsets.
   """
 
-  def __init__(self, code):
-    self.instruction_offsets = [i for _, _, i in _parse_instructions(code)]
+  def __init__(self, code, instructions=None):
+    """Build the index.
+
+    Args:
+      code: A bytecode string (not a code object).
+      instructions: Optionally, the result of _parse_instructions(code) as a
+        list, to avoid parsing code again.
+    """
+    if instructions is None:
+      instructions = _parse_instructions(code)
+    self.instruction_offsets = [i for _, _, i in instructions]
 
   def prev(self, offset):
     """Return the offset of the previous instruction.
@@ -164,11 +177,12 @@ class InstructionsIndex(object):
         bisect.bisect_right(self.instruction_offsets, offset)]
 
 
-def _find_jumps(code):
+def _find_jumps(instructions):
   """Detect all offsets in a byte code which are instructions that can jump.
 
   Args:
-    code: A bytecode string (not a code object).
+    instructions: The instructions of a bytecode string as produced by
+      _parse_instructions.
 
   Returns:
     A pair of a dict and set. The dict mapping the offsets of jump instructions
@@ -177,7 +191,7 @@ def _find_jumps(code):
   """
   all_targets = set()
   jumps = {}
-  for op, oparg, i in _parse_instructions(code):
+  for op, oparg, i in instructions:
     targets = set()
     is_jump = False
     next_i = i + 1 if oparg is None else i + 3
@@ -185,10 +199,10 @@ def _find_jumps(code):
       if op in _TARGETTED_JUMPS:
         # Add the known jump target
         is_jump = True
-        if op in dis.hasjrel:
+        if op in _HASJREL:
           targets.add(next_i+oparg)
           all_targets.add(next_i+oparg)
-        elif op in dis.hasjabs:
+        elif op in _HASJABS:
           targets.add(oparg)
           all_targets.add(oparg)
         else:
@@ -209,6 +223,26 @@ def _find_jumps(code):
   return jumps, all_targets
 
 
+def _find_labels(instructions):
+  """Find all jump targets, the same as dis.findlabels.
+
+  Args:
+    instructions: The instructions of a bytecode string as produced by
+      _parse_instructions.
+
+  Returns:
+    A set of the offsets that are jump targets.
+  """
+  labels = set()
+  for op, oparg, i in instructions:
+    if oparg is not None:
+      if op in _HASJREL:
+        labels.add(i + 3 + oparg)
+      elif op in _HASJABS:
+        labels.add(oparg)
+  return labels
+
+
 class Block(object):
   """A Block instance represents a basic block in the CFG.
 
@@ -311,24 +345,29 @@ class BlockTable(object):
       code: a code object (such as function.func_code) to process.
     """
     self.code = code
+    # Cache for get_ancestors_first_traversal.
+    self._ancestors_first_traversal = None
     self.line_offsets, self.lines = zip(*dis.findlinestarts(self.code))
 
-    instruction_index = InstructionsIndex(code.co_code)
+    # Parse the bytecode once and share the result between the passes below.
+    instructions = list(_parse_instructions(code.co_code))
+
+    instruction_index = InstructionsIndex(code.co_code, instructions)
 
     # Get a map from jump instructions to jump targets and a combined set of all
     # targets.
-    jumps, all_targets = _find_jumps(code.co_code)
+    jumps, all_targets = _find_jumps(instructions)
 
     # TODO(ampere): Using dis.findlabels may not be the right
     # thing. Specifically it is not clear when the targets of SETUP_*
     # instructions should be used to make basic blocks.
 
     # Make a list of all the directly obvious block begins from the jump targets
-    # found above and the labels found by dis.
-    direct_begins = all_targets.union(dis.findlabels(code.co_code))
+    # found above and the labels dis.findlabels would find.
+    direct_begins = all_targets.union(_find_labels(instructions))
 
     # Any jump instruction must be the end of a basic block.
-    direct_ends = jumps.viewkeys()
+    direct_ends = six.viewkeys(jumps)
 
     # The actual sorted list of begins is build using the direct_begins along
     # with all instructions that follow a jump instruction. Also the beginning
@@ -363,7 +402,7 @@ class BlockTable(object):
 
     # Build the actual basic blocks by pairing the begins and ends directly.
     self._blocks = [Block(begin, end, code=code, block_table=self)
-                    for begin, end in itertools.izip(begins, ends)]
+                    for begin, end in six.moves.zip(begins, ends)]
     # Build a begins list for use with bisect
     self._block_begins = [b.begin for b in self._blocks]
     # Fill in incoming and outgoing
@@ -377,12 +416,7 @@ class BlockTable(object):
     # the number of blocks. This could be corrected by using a tree and
     # searching down it for lookups.
     self._compute_dominators()
-    # Compute all the reachability information by starting recursion from each
-    # node.
-    # TODO(ampere): This could be much more efficient, but graphs are small.
-    for block in self._blocks:
-      if not block.incoming:
-        self._compute_reachable_from(block, frozenset())
+    self._compute_reachable_from()
 
   def get_basic_block(self, index):
     """Get the basic block that contains the instruction at the given index."""
@@ -407,28 +441,36 @@ class BlockTable(object):
     """
     return self.code.co_filename
 
-  @staticmethod
-  def _compute_reachable_from(current, history):
-    """Compute reachability information starting from current.
+  def _compute_reachable_from(self):
+    """Compute reachability information for all nodes.
 
-    The performs a depth first traversal over the graph and adds information to
-    Block._reachable_from about what paths reach each node.
+    A block b is in a._reachable_from if b can be reached from a block with no
+    incoming edges and a can be reached from b along one or more edges. Blocks
+    that cannot be reached from a block with no incoming edges are left with
+    None.
 
-    Args:
-      current: The current node in the traversal.
-      history: A set of nodes that are on the current path to this node.
+    This walks the incoming edges backwards from each block instead of
+    enumerating paths from the roots, which can take exponential time.
     """
-    orig = current._reachable_from  # pylint: disable=protected-access
-    new = history | (orig or set())
-    # The base case is that there is no new information, about this node. This
-    # comparison is why None is used above; we need to be able to distinguish
-    # nodes we have never touched from nodes with an empty reachable_from set.
-    if new != orig:
-      current._reachable_from = new  # pylint: disable=protected-access
-      for child in current.outgoing:
-        if child:
-          # pylint: disable=protected-access
-          BlockTable._compute_reachable_from(child, history | {current})
+    # pylint: disable=protected-access
+    # For accessing Block._reachable_from
+    # Find all blocks reachable from a block with no incoming edges.
+    live = set()
+    worklist = [block for block in self._blocks if not block.incoming]
+    while worklist:
+      block = worklist.pop()
+      if block not in live:
+        live.add(block)
+        worklist.extend(child for child in block.outgoing if child)
+    for block in live:
+      ancestors = set()
+      worklist = list(block.incoming)
+      while worklist:
+        pred = worklist.pop()
+        if pred not in ancestors:
+          ancestors.add(pred)
+          worklist.extend(pred.incoming)
+      block._reachable_from = ancestors & live
 
   def reachable_from(self, a, b):
     """True if the instruction at a is reachable from the instruction at b."""
@@ -451,24 +493,27 @@ class BlockTable(object):
     all_blocks_set = frozenset(self._blocks)
     for block in self._blocks[1:]:  # all but entry block
       block._dominators = all_blocks_set
-    # Now we perform iteration to solve for the dominators.
-    while True:
-      # TODO(ampere): use a worklist here. But graphs are small.
-      changed = False
-      for block in self._blocks[1:]:  # all but entry block
-        # Compute new dominator information for block by taking the intersection
-        # of the dominators of every incoming block and adding itself.
-        new_dominators = all_blocks_set
-        for pred in block.incoming:
-          new_dominators &= pred._dominators
-        new_dominators |= {block}
-        # Update only if something changed.
-        if new_dominators != block._dominators:
-          block._dominators = new_dominators
-          changed = True
-      # If we did a pass without changing anything exit.
-      if not changed:
-        break
+    # Now we perform iteration to solve for the dominators. A block only needs
+    # to be recomputed when the dominators of one of its predecessors change,
+    # so keep a worklist of such blocks instead of repeating full passes.
+    worklist = collections.deque(self._blocks[1:])  # all but entry block
+    queued = set(worklist)
+    while worklist:
+      block = worklist.popleft()
+      queued.remove(block)
+      # Compute new dominator information for block by taking the intersection
+      # of the dominators of every incoming block and adding itself.
+      new_dominators = all_blocks_set
+      for pred in block.incoming:
+        new_dominators &= pred._dominators
+      new_dominators |= {block}
+      # Update only if something changed.
+      if new_dominators != block._dominators:
+        block._dominators = new_dominators
+        for child in block.outgoing:
+          if child and child is not entry and child not in queued:
+            worklist.append(child)
+            queued.add(child)
 
   def dominates(self, a, b):
     """True if the instruction at a dominates the instruction at b."""
@@ -482,6 +527,20 @@ class BlockTable(object):
       return block_a.dominates(block_b)
 
   def get_ancestors_first_traversal(self):
+    """Get an ancestors first traversal of the blocks in this table.
+
+    The traversal is computed once per table, see
+    _compute_ancestors_first_traversal.
+
+    Returns:
+      A new list of blocks in the proper order.
+    """
+    if self._ancestors_first_traversal is None:
+      self._ancestors_first_traversal = tuple(
+          self._compute_ancestors_first_traversal())
+    return list(self._ancestors_first_traversal)
+
+  def _compute_ancestors_first_traversal(self):
     """Build an ancestors first traversal of the blocks in this table.
 
     Back edges are detected and handled specially. Specifically, the back edge
@@ -495,25 +554,31 @@ class BlockTable(object):
     # TODO(ampere): This assumes all loops are natural. This may be false, but I
     # kinda doubt it. The python compiler is very well behaved.
     order = [self._blocks[0]]
+    # The same blocks as order, kept as a set so membership tests do not need to
+    # scan the list.
+    ordered = set(order)
     # A partially processed block has been added to the order, but is part of a
     # loop that has not been fully processed.
     partially_processed = set()
+    # The incoming blocks of each block that are not from back edges. Blocks
+    # are visited many times, so compute these once up front.
+    forward_incoming = dict(
+        (block, frozenset(b for b in block.incoming if not block.dominates(b)))
+        for block in self._blocks)
     worklist = list(self._blocks)
     while worklist:
       block = worklist.pop(0)
       # We can process a block if:
       # 1) All forward incoming blocks are in the order
       # 2) All partially processed blocks are reachable from this block
-      forward_incoming = set(b for b in block.incoming
-                             if not block.dominates(b))
-      all_forward_incoming_ordered = forward_incoming.issubset(order)
+      # Check the cheap condition first; most visits fail it, and then the
+      # reachability scan over partially_processed can be skipped.
       # TODO(ampere): Replace forward_incoming in order check with a counter
       # that counts the remaining blocks not in order. Similarly below for
       # incoming.
-      all_partially_processed_reachable = all(b.reachable_from(block)
-                                              for b in partially_processed)
-      if (not all_forward_incoming_ordered or
-          not all_partially_processed_reachable):
+      if not forward_incoming[block].issubset(ordered):
+        continue
+      if not all(b.reachable_from(block) for b in partially_processed):
         continue
       # When a node is processed:
       #   If all incoming blocks (forward and backward) are in the order add to
@@ -522,7 +587,7 @@ class BlockTable(object):
       #     order, and we add block to the order and to partially_processed
       # We add children to the work list if we either removed block from
       # partially_processed or added it to order.
-      all_incoming_ordered = block.incoming.issubset(order)
+      all_incoming_ordered = block.incoming.issubset(ordered)
       # When adding to the work list remove None outgoing edges since they
       # represent unknown targets that we cannot handle.
       children = filter(None, block.outgoing)
@@ -532,14 +597,16 @@ class BlockTable(object):
           # processed.
           partially_processed.remove(block)
           worklist += children
-        elif block not in order:
+        elif block not in ordered:
           # block is ready to add and is not in the order.
           order.append(block)
+          ordered.add(block)
           worklist += children
-      elif block not in order:
+      elif block not in ordered:
         # block is not in the order and is part of a cycle.
         partially_processed.add(block)
         order.append(block)
+        ordered.add(block)
         worklist += children
     return order
 
@@ -553,15 +620,17 @@ class CFG(object):
 
   def __init__(self):
     """Initialize a CFG object."""
+    # Maps id(code) to the BlockTable for code. Hashing a code object hashes
+    # its bytecode, constants and names, so we key by identity instead. Each
+    # table holds a reference to its code object which keeps the id valid.
     self._block_tables = {}
 
   def get_block_table(self, code):
     """Get (building if needed) the BlockTable for a given code object."""
-    if code in self._block_tables:
-      ret = self._block_tables[code]
-    else:
+    ret = self._block_tables.get(id(code))
+    if ret is None:
       ret = BlockTable(code)
-      self._block_tables[code] = ret
+      self._block_tables[id(code)] = ret
     return ret
 
   def get_basic_block(self, code, index):
@@ -585,9 +654,9 @@ def _bytecode_repr(code):
       sb += ", " + str(oparg & 255) + ", " + str((oparg >> 8) & 255)
     sb += ",  # " + str(i)
     if oparg is not None:
-      if op in dis.hasjrel:
+      if op in _HASJREL:
         sb += ", dest=" + str(i+3+oparg)
-      elif op in dis.hasjabs:
+      elif op in _HASJABS:
         sb += ", dest=" + str(oparg)
       else:
         sb += ", arg=" + str(oparg)
@@ -55,14 +55,25 @@ class Function(object):
         self.__dict__ = {}
         self.func_closure = closure
         self.__doc__ = code.co_consts[0] if code.co_consts else None
+        # Built on demand by _real_func.
+        self._func = None
 
-        # Sometimes, we need a real Python function.  This is for that.
-        kw = {
-            'argdefs': self.func_defaults,
-        }
-        if closure:
-            kw['closure'] = tuple(make_cell(0) for _ in closure)
-        self._func = types.FunctionType(code, globs, **kw)
+    def _real_func(self):
+        """Get a real Python function for this function.
+
+        Sometimes, we need a real Python function.  This is for that. Most
+        calls never need it, so it is only built the first time it is asked
+        for.
+        """
+        if self._func is None:
+            kw = {
+                'argdefs': self.func_defaults,
+            }
+            if self.func_closure:
+                kw['closure'] = tuple(make_cell(0) for _ in self.func_closure)
+            self._func = types.FunctionType(self.func_code, self.func_globals,
+                                            **kw)
+        return self._func
 
     def __repr__(self):         # pragma: no cover
         return '<Function %s at 0x%08x>' % (
@@ -85,8 +96,31 @@ class Function(object):
             # so just do the right thing.
             assert len(args) == 1 and not kwargs, 'Surprising comprehension!'
             callargs = {'.0': args[0]}
+        elif (not kwargs and len(args) == self.func_code.co_argcount and
+              not self.func_code.co_flags & (self.CO_VARARGS |
+                                             self.CO_VARKEYWORDS) and
+              not getattr(self.func_code, 'co_kwonlyargcount', 0)):
+            # The common case of exactly the positional arguments needs no
+            # matching, and inspect.getcallargs is slow.
+            callargs = dict(zip(self.func_code.co_varnames, args))
         else:
-            callargs = inspect.getcallargs(self._func, *args, **kwargs)
+            callargs = inspect.getcallargs(self._real_func(), *args,
+                                           **kwargs)
+            if PY2:
+                # getcallargs unpacks tuple parameters into their names, but
+                # the bytecode unpacks them itself from hidden '.N' arguments.
+                # Those can't be passed by keyword, so they come from the
+                # positional arguments or the defaults.
+                argcount = self.func_code.co_argcount
+                argnames = self.func_code.co_varnames[:argcount]
+                defaults = self.func_defaults or ()
+                for i, name in enumerate(argnames):
+                    if name.startswith('.'):
+                        if i < len(args):
+                            callargs[name] = args[i]
+                        else:
+                            callargs[name] = defaults[i - argcount +
+                                                      len(defaults)]
         frame = self._vm.make_frame(
             self.func_code, callargs, self.func_globals, self.func_locals
         )
@@ -113,32 +147,48 @@ class Class(object):
         self.locals['__name__'] = self.__name__
         self.locals['__mro__'] = self.__mro__
         self.locals['__bases__'] = self.__bases__
+        # The namespace dict of each class in the MRO, in order. VM classes
+        # keep theirs in locals and python host environment classes in
+        # __dict__, so sort that out once here instead of in every lookup.
+        self._mro_namespaces = tuple(
+            base.locals if isinstance(base, Class) else base.__dict__
+            for base in self.__mro__)
 
     @classmethod
     def mro_merge(cls, seqs):
         """
         Merge a sequence of MROs into a single resulting MRO.
-        This code is copied from the following URL with print statments removed.
+        This is the merge from the following URL, changed to keep an index to
+        the head of each sequence instead of deleting from the front, and to
+        count tail occurrences instead of scanning a slice for each candidate.
         https://www.python.org/download/releases/2.3/mro/
         """
+        seqs = [seq for seq in seqs if seq]
+        heads = [0] * len(seqs)
+        # The number of times each class appears after the head of a sequence.
+        in_tails = collections.Counter()
+        for seq in seqs:
+            in_tails.update(seq[1:])
         res = []
         while True:
-            nonemptyseqs = [seq for seq in seqs if seq]
-            if not nonemptyseqs:
+            nonempty = [i for i, seq in enumerate(seqs)
+                        if heads[i] < len(seq)]
+            if not nonempty:
                 return res
-            for seq in nonemptyseqs:  # find merge candidates among seq heads
-                cand = seq[0]
-                nothead = [s for s in nonemptyseqs if cand in s[1:]]
-                if nothead:
-                    cand = None  # reject candidate
-                else:
+            for i in nonempty:  # find merge candidates among seq heads
+                cand = seqs[i][heads[i]]
+                if not in_tails[cand]:
                     break
-            if not cand:
+            else:
                 raise TypeError("Illegal inheritance.")
             res.append(cand)
-            for seq in nonemptyseqs:  # remove candidate
-                if seq[0] == cand:
-                    del seq[0]
+            for i in nonempty:  # remove candidate
+                seq = seqs[i]
+                if seq[heads[i]] == cand:
+                    heads[i] += 1
+                    if heads[i] < len(seq):
+                        # The new head is no longer part of this tail.
+                        in_tails[seq[heads[i]]] -= 1
 
     @classmethod
     def _compute_mro(cls, c):
@@ -162,18 +212,13 @@ class Class(object):
         Find an attribute in self and return it raw. This does not handle
         properties or method wrapping.
         """
-        for base in self.__mro__:
+        for namespace in self._mro_namespaces:
             # The following code does a double lookup on the dict, however
             # measurements show that this is faster than either a special
             # sentinel value or catching KeyError.
-            # Handle both VM classes and python host environment classes.
-            if isinstance(base, Class):
-                if name in base.locals:
-                    return base.locals[name]
-            else:
-                if name in base.__dict__:
-                    # Avoid using getattr so we can handle method wrapping
-                    return base.__dict__[name]
+            # Avoid using getattr so we can handle method wrapping.
+            if name in namespace:
+                return namespace[name]
         raise AttributeError(
             "%r class has no attribute %r" % (self.__name__, name)
         )
@@ -223,6 +268,7 @@ class Object(object):
 
 
 class Method(object):
+    __slots__ = ['im_self', 'im_class', 'im_func']
 
     def __init__(self, obj, _class, func):
         self.im_self = obj
@@ -262,6 +308,7 @@ class Cell(object):
            actual value.
 
     """
+    __slots__ = ['contents']
 
     def __init__(self, value):
         self.contents = value
@@ -367,6 +414,7 @@ class Frame(object):
 
 
 class Generator(object):
+    __slots__ = ['gi_frame', 'vm', 'first', 'finished']
 
     def __init__(self, g_frame, vm):
         self.gi_frame = g_frame
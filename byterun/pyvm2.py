@@ -12,6 +12,7 @@
 
 from __future__ import print_function, division
 import dis
+import functools
 import inspect
 import linecache
 import logging
@@ -32,6 +33,14 @@ if six.PY3:
 else:
     byteint = ord
 
+# The opcode classes in dis are lists; use frozensets for membership tests.
+_HASCONST = frozenset(dis.hasconst)
+_HASFREE = frozenset(dis.hasfree)
+_HASNAME = frozenset(dis.hasname)
+_HASJREL = frozenset(dis.hasjrel)
+_HASJABS = frozenset(dis.hasjabs)
+_HASLOCAL = frozenset(dis.haslocal)
+
 # Create a repr that won't overflow.
 repr_obj = reprlib.Repr()
 repr_obj.maxother = 120
@@ -52,6 +61,10 @@ class VirtualMachine(object):
         self.frame = None
         self.return_value = None
         self.last_exception = None
+        # Decoded instructions, see parse_byte_and_args.
+        self._decoded_code = {}
+        # Maps bytecode names to the functions executing them, see dispatch.
+        self._bytecode_fns = {}
         self.vmbuiltins = dict(__builtins__)
         self.vmbuiltins["isinstance"] = self.isinstance
         # Operator tables. These are overriden by subclasses to replace the
@@ -79,6 +92,21 @@ class VirtualMachine(object):
             'XOR':      operator.xor,
             'OR':       operator.or_,
         }
+        self.inplace_operators = {
+            'POWER':    operator.ipow,
+            'MULTIPLY': operator.imul,
+            'DIVIDE':   getattr(operator, 'idiv', lambda x, y: None),
+            'FLOOR_DIVIDE': operator.ifloordiv,
+            'TRUE_DIVIDE':  operator.itruediv,
+            'MODULO':   operator.imod,
+            'ADD':      operator.iadd,
+            'SUBTRACT': operator.isub,
+            'LSHIFT':   operator.ilshift,
+            'RSHIFT':   operator.irshift,
+            'AND':      operator.iand,
+            'XOR':      operator.ixor,
+            'OR':       operator.ior,
+        }
         self.compare_operators = [
             operator.lt,
             operator.le,
@@ -150,9 +178,12 @@ class VirtualMachine(object):
     def make_frame(self, code, callargs={}, f_globals=None, f_locals=None):
         # The callargs default is safe because we never modify the dict.
         # pylint: disable=dangerous-default-value
-        log.info("make_frame: code=%r, callargs=%s, f_globals=%r, f_locals=%r",
-                 code, repper(callargs), (type(f_globals), id(f_globals)),
-                  (type(f_locals), id(f_locals)))
+        if log.isEnabledFor(logging.INFO):
+            # repper(callargs) is not lazy, so only build it when it is logged.
+            log.info("make_frame: code=%r, callargs=%s, f_globals=%r, "
+                     "f_locals=%r", code, repper(callargs),
+                     (type(f_globals), id(f_globals)),
+                     (type(f_locals), id(f_locals)))
         if f_globals is not None:
             f_globals = f_globals
             if f_locals is None:
@@ -237,42 +268,63 @@ class VirtualMachine(object):
     def parse_byte_and_args(self):
         f = self.frame
         opoffset = f.f_lasti
+        code = f.f_code
+        # Decoding is a pure function of the code object and offset, so it is
+        # cached per code object. The cache is keyed by identity (code objects
+        # compare by value) and holds the code to keep the id valid.
+        cached = self._decoded_code.get(id(code))
+        if cached is None:
+            cached = self._decoded_code[id(code)] = (code, {})
+        instructions = cached[1]
+        if opoffset in instructions:
+            byteName, arguments, f.f_lasti = instructions[opoffset]
+        else:
+            byteName, arguments, f.f_lasti = instructions[opoffset] = (
+                self.decode_instruction(code, opoffset))
+        return byteName, arguments, opoffset
+
+    def decode_instruction(self, code, opoffset):
+        """Decode the instruction at opoffset in code.
+
+        Returns:
+          A triple (byteName, arguments, next offset).
+        """
         try:
-            byteCode = byteint(f.f_code.co_code[opoffset])
+            byteCode = byteint(code.co_code[opoffset])
         except IndexError:
             raise VirtualMachineError(
                 "Bad bytecode offset %d in %s (len=%d)" %
-                (opoffset, str(f.f_code), len(f.f_code.co_code))
+                (opoffset, str(code), len(code.co_code))
             )
-        f.f_lasti += 1
+        lasti = opoffset + 1
         byteName = dis.opname[byteCode]
         arg = None
-        arguments = []
+        arguments = ()
         if byteCode >= dis.HAVE_ARGUMENT:
-            arg = f.f_code.co_code[f.f_lasti:f.f_lasti+2]
-            f.f_lasti += 2
+            arg = code.co_code[lasti:lasti+2]
+            lasti += 2
             intArg = byteint(arg[0]) + (byteint(arg[1]) << 8)
-            if byteCode in dis.hasconst:
-                arg = f.f_code.co_consts[intArg]
-            elif byteCode in dis.hasfree:
-                if intArg < len(f.f_code.co_cellvars):
-                    arg = f.f_code.co_cellvars[intArg]
+            if byteCode in _HASCONST:
+                arg = code.co_consts[intArg]
+            elif byteCode in _HASFREE:
+                if intArg < len(code.co_cellvars):
+                    arg = code.co_cellvars[intArg]
                 else:
-                    var_idx = intArg - len(f.f_code.co_cellvars)
-                    arg = f.f_code.co_freevars[var_idx]
-            elif byteCode in dis.hasname:
-                arg = f.f_code.co_names[intArg]
-            elif byteCode in dis.hasjrel:
-                arg = f.f_lasti + intArg
-            elif byteCode in dis.hasjabs:
+                    var_idx = intArg - len(code.co_cellvars)
+                    arg = code.co_freevars[var_idx]
+            elif byteCode in _HASNAME:
+                arg = code.co_names[intArg]
+            elif byteCode in _HASJREL:
+                arg = lasti + intArg
+            elif byteCode in _HASJABS:
                 arg = intArg
-            elif byteCode in dis.haslocal:
-                arg = f.f_code.co_varnames[intArg]
+            elif byteCode in _HASLOCAL:
+                arg = code.co_varnames[intArg]
             else:
                 arg = intArg
-            arguments = [arg]
+            arguments = (arg,)
 
-        return byteName, arguments, opoffset
+        return byteName, arguments, lasti
 
     def log(self, byteName, arguments, opoffset):
         # pylint: disable=logging-not-lazy
@@ -287,25 +339,35 @@ class VirtualMachine(object):
         log.info("  %sblks: %s" % (indent, block_stack_rep))
         log.info("%s%s" % (indent, op))
 
+    def get_bytecode_fn(self, byteName):
+        """Find the function that executes the bytecode named byteName.
+
+        The result is cached per VM by dispatch, so this only runs once per
+        bytecode name.
+        """
+        if byteName.startswith('UNARY_'):
+            return functools.partial(self.unaryOperator, byteName[6:])
+        elif byteName.startswith('BINARY_'):
+            return functools.partial(self.binaryOperator, byteName[7:])
+        elif byteName.startswith('INPLACE_'):
+            return functools.partial(self.inplaceOperator, byteName[8:])
+        elif 'SLICE+' in byteName:
+            return functools.partial(self.sliceOperator, byteName)
+        bytecode_fn = getattr(self, 'byte_%s' % byteName, None)
+        if not bytecode_fn:            # pragma: no cover
+            raise VirtualMachineError(
+                "unknown bytecode type: %s" % byteName
+            )
+        return bytecode_fn
+
     def dispatch(self, byteName, arguments):
         why = None
         try:
-            if byteName.startswith('UNARY_'):
-                self.unaryOperator(byteName[6:])
-            elif byteName.startswith('BINARY_'):
-                self.binaryOperator(byteName[7:])
-            elif byteName.startswith('INPLACE_'):
-                self.inplaceOperator(byteName[8:])
-            elif 'SLICE+' in byteName:
-                self.sliceOperator(byteName)
-            else:
-                # dispatch
-                bytecode_fn = getattr(self, 'byte_%s' % byteName, None)
-                if not bytecode_fn:            # pragma: no cover
-                    raise VirtualMachineError(
-                        "unknown bytecode type: %s" % byteName
-                    )
-                why = bytecode_fn(*arguments)
+            bytecode_fn = self._bytecode_fns.get(byteName)
+            if bytecode_fn is None:
+                bytecode_fn = self._bytecode_fns[byteName] = (
+                    self.get_bytecode_fn(byteName))
+            why = bytecode_fn(*arguments)
         except:  # pylint: disable=bare-except
             # deal with exceptions encountered while executing the op.
             self.last_exception = sys.exc_info()[:2] + (None,)
@@ -679,33 +741,7 @@ class VirtualMachine(object):
 
     def inplaceOperator(self, op):
         x, y = self.popn(2)
-        if op == 'POWER':
-            x **= y
-        elif op == 'MULTIPLY':
-            x *= y
-        elif op in ['DIVIDE', 'FLOOR_DIVIDE']:
-            x //= y
-        elif op == 'TRUE_DIVIDE':
-            x /= y
-        elif op == 'MODULO':
-            x %= y
-        elif op == 'ADD':
-            x += y
-        elif op == 'SUBTRACT':
-            x -= y
-        elif op == 'LSHIFT':
-            x <<= y
-        elif op == 'RSHIFT':
-            x >>= y
-        elif op == 'AND':
-            x &= y
-        elif op == 'XOR':
-            x ^= y
-        elif op == 'OR':
-            x |= y
-        else:           # pragma: no cover
-            raise VirtualMachineError("Unknown in-place operator: %r" % op)
-        self.push(x)
+        self.push(self.inplace_operators[op](x, y))
 
     def sliceOperator(self, op):
         start = 0
@@ -1212,7 +1248,7 @@ class VirtualMachine(object):
         # TODO: this doesn't use __all__ properly.
         mod = self.pop()
         attrs = self.get_module_attributes(mod)
-        for attr, val in attrs.iteritems():
+        for attr, val in attrs.items():
             if attr[0] != '_':
                 self.store_local(attr, val)
 
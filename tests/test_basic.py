@@ -62,6 +62,9 @@ class TestIt(vmtest.VmTestCase):
                 x /= y
                 assert x == 2 and y == 3
                 assert isinstance(x, int)
+                x = 5.0
+                x /= 2
+                assert x == 2.5
                 """)
     elif PY3:
         def test_inplace_division(self):
@@ -5,6 +5,9 @@ from __future__ import print_function
 
 import unittest
 from tests import vmtest
+import six
+
+PY3, PY2 = six.PY3, not six.PY3
 
 
 class TestFunctions(vmtest.VmTestCase):
@@ -58,6 +61,22 @@ class TestFunctions(vmtest.VmTestCase):
             fn(6, *[77], **{'c': 23, 'd': [123]})
             """)
 
+    if PY2:
+        def test_tuple_parameters(self):
+            self.assert_ok("""\
+                def fn((a, b), c):
+                    return a + b * c
+                print(fn((1, 2), 3))
+                print(fn((1, 2), c=3))
+                """)
+            self.assert_ok("""\
+                def fn(a, (b, c)=(2, 3), *args):
+                    return a + b * c + len(args)
+                print(fn(1))
+                print(fn(1, (4, 5)))
+                print(fn(1, (4, 5), 6, 7))
+                """)
+
     def test_defining_functions_with_args_kwargs(self):
         self.assert_ok("""\
             def fn(*args):
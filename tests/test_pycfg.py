@@ -603,6 +603,16 @@ class CFGTest(unittest.TestCase):
     self.assertEqual(table.get_ancestors_first_traversal(),
                      [bb(o) for o in [0, 6, 9]])
 
+  def testOrderIsNotShared(self):
+    cfg = pycfg.CFG()
+    table = cfg.get_block_table(self.codeRaise.func_code)
+
+    bb = table.get_basic_block
+    order = table.get_ancestors_first_traversal()
+    order.pop(0)
+    self.assertEqual(table.get_ancestors_first_traversal(),
+                     [bb(o) for o in [0, 6, 9]])
+
 
 class InstructionsIndexTest(unittest.TestCase):
 